@@ -0,0 +1,59 @@
+# backend/benchmarks/bench_ask.py
+#
+# Fire concurrent questions at a running backend and report time to first token
+# and total latency for /ask and /ask/stream. Pair with mock_llm_server.py.
+#
+#   python benchmarks/bench_ask.py --url http://127.0.0.1:8000 --users 50
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def ask_once(client, url, stream, i):
+    # a distinct question per request, so the answer cache never serves it
+    # and both passes measure the LLM path
+    body = {"query": f"what is this about? ({'stream' if stream else 'ask'} {i})"}
+    start = time.perf_counter()
+    first = None
+    if stream:
+        async with client.stream("POST", url + "/ask/stream", json=body) as r:
+            async for line in r.aiter_lines():
+                if first is None and line.startswith("data:") and '"token"' in line:
+                    first = time.perf_counter() - start
+    else:
+        r = await client.post(url + "/ask", json=body)
+        r.raise_for_status()
+    total = time.perf_counter() - start
+    return first if first is not None else total, total
+
+
+async def run(url, users, stream):
+    async with httpx.AsyncClient(timeout=120) as client:
+        results = await asyncio.gather(*(ask_once(client, url, stream, i) for i in range(users)))
+    ttft = [r[0] for r in results]
+    total = [r[1] for r in results]
+    name = "/ask/stream" if stream else "/ask"
+    print(f"{name:<12} users={users:<4} ttft p50={statistics.median(ttft):.3f}s p95={pct(ttft, 95):.3f}s"
+          f"  total p50={statistics.median(total):.3f}s p95={pct(total, 95):.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.users, stream=False))
+    asyncio.run(run(args.url, args.users, stream=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# backend/benchmarks/bench_chunker.py
+#
+# Throughput and peak memory of the chunkers: LangChain's splitter, the linear
+# word fallback, the old quadratic fallback it replaced, token windows, and
+# bulk multi-document chunking.
+# Run from backend/:  python benchmarks/bench_chunker.py --mb 1 --docs 200
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import chunker
+
+
+def make_text(n_bytes, seed=0):
+    rng = random.Random(seed)
+    vocab = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(2, 10))) for _ in range(5000)]
+    words, size = [], 0
+    while size < n_bytes:
+        w = rng.choice(vocab)
+        words.append(w)
+        size += len(w) + 1
+        if rng.random() < 0.02:
+            words.append("\n\n")
+    return " ".join(words)
+
+
+def quadratic_fallback(text, chunk_size=800, chunk_overlap=100):
+    # The word-based fallback chunker.py used before the linear rewrite
+    words = text.split()
+    chunks = []
+    current = []
+    for w in words:
+        if len(" ".join(current + [w])) > chunk_size:
+            chunks.append(" ".join(current))
+            current = [w]
+        else:
+            current.append(w)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def measure(fn, *args):
+    # timed and memory-traced in separate runs: tracemalloc slows every allocation
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def report(name, n_bytes, elapsed, peak, n_chunks):
+    print(f"{name:<28} {n_bytes / elapsed / 1e6:>8.2f} MB/s {peak / 1e6:>9.1f} MB peak {n_chunks:>8} chunks")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=1.0, help="size of the single-document text")
+    parser.add_argument("--docs", type=int, default=200, help="documents for the bulk run")
+    parser.add_argument("--doc-kb", type=int, default=50)
+    parser.add_argument("--encoding", default="cl100k_base")
+    args = parser.parse_args()
+
+    text = make_text(int(args.mb * 1e6))
+    n = len(text)
+    print(f"single document: {n / 1e6:.2f} MB")
+
+    if chunker._HAS_LANGCHAIN_SPLITTER:
+        splitter = chunker.RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100, length_function=len)
+        elapsed, peak, chunks = measure(splitter.split_text, text)
+        report("langchain (chars)", n, elapsed, peak, len(chunks))
+    else:
+        print("langchain (chars)            not installed")
+
+    elapsed, peak, chunks = measure(chunker._chunk_words, text, 800, 100)
+    report("linear fallback (chars)", n, elapsed, peak, len(chunks))
+
+    # the quadratic chunker is slow; a tenth of the text is enough to show the gap
+    small = text[: n // 10]
+    elapsed, peak, chunks = measure(quadratic_fallback, small)
+    report("old fallback (1/10 text)", len(small), elapsed, peak, len(chunks))
+
+    try:
+        chunker._get_encoding(args.encoding)
+    except Exception as e:
+        print(f"token windows                skipped: {e.__class__.__name__}")
+    else:
+        elapsed, peak, chunks = measure(chunker._chunk_tokens, text, 200, 25, args.encoding)
+        report(f"token windows ({args.encoding})", n, elapsed, peak, len(chunks))
+        if chunker._HAS_LANGCHAIN_SPLITTER:
+            splitter = chunker.RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+                encoding_name=args.encoding, chunk_size=200, chunk_overlap=25)
+            elapsed, peak, chunks = measure(splitter.split_text, text)
+            report("langchain (tokens)", n, elapsed, peak, len(chunks))
+
+    docs = [make_text(args.doc_kb * 1000, seed=i) for i in range(args.docs)]
+    total = sum(len(d) for d in docs)
+    print(f"\nbulk: {args.docs} documents, {total / 1e6:.2f} MB")
+    for workers in (1, None):
+        start = time.perf_counter()
+        results = chunker.chunk_documents(docs, workers=workers)
+        elapsed = time.perf_counter() - start
+        label = "in-process" if workers == 1 else f"process pool ({os.cpu_count()} workers)"
+        print(f"{label:<28} {total / elapsed / 1e6:>8.2f} MB/s {sum(map(len, results)):>26} chunks")
+
+
+if __name__ == "__main__":
+    main()
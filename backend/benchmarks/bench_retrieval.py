@@ -0,0 +1,71 @@
+# backend/benchmarks/bench_retrieval.py
+#
+# Compare the old /ask linear-scan scorer with the BM25 inverted index.
+# Run from backend/:  python benchmarks/bench_retrieval.py --sizes 10000 100000 1000000
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bm25_index import BM25Index
+
+
+def make_corpus(n_chunks, words_per_chunk, vocab_size, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"term{i:06d}" for i in range(vocab_size)]
+    # Zipf-ish weights so a few terms are common and most are rare, like real text
+    weights = [1.0 / (i + 1) for i in range(vocab_size)]
+    return vocab, [
+        " ".join(rng.choices(vocab, weights=weights, k=words_per_chunk))
+        for _ in range(n_chunks)
+    ]
+
+
+def linear_scan(chunks, q, top_k=5):
+    # The scorer /ask used before the inverted index
+    q_words = [w.lower() for w in q.split() if len(w) > 2]
+    scored = []
+    for chunk in chunks:
+        score = sum(w in chunk.lower() for w in q_words)
+        scored.append((score, chunk))
+    scored.sort(reverse=True, key=lambda x: x[0])
+    return [c for s, c in scored[:top_k]]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    print(f"{'chunks':>10} {'build s':>9} {'bm25 ms/q':>10} {'scan ms/q':>10} {'speedup':>8}")
+    for n in args.sizes:
+        vocab, chunks = make_corpus(n, args.words, args.vocab)
+        queries = [" ".join(rng.sample(vocab[:5000], 4)) for _ in range(args.queries)]
+
+        index = BM25Index()
+        build_s = timed(index.add, chunks)
+
+        bm25_s = sum(timed(index.search, q) for q in queries) / len(queries)
+        # the linear scan is slow at large sizes, a few queries are enough
+        scan_queries = queries[: max(1, min(len(queries), 1_000_000 // n))]
+        scan_s = sum(timed(linear_scan, chunks, q) for q in scan_queries) / len(scan_queries)
+
+        print(f"{n:>10} {build_s:>9.2f} {bm25_s * 1000:>10.2f} {scan_s * 1000:>10.2f} {scan_s / bm25_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
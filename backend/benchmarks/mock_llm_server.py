@@ -0,0 +1,85 @@
+# backend/benchmarks/mock_llm_server.py
+#
+# OpenAI/Groq-compatible chat completions server with fixed latencies, for
+# exercising /ask and /ask/stream without a real LLM.
+#
+#   uvicorn benchmarks.mock_llm_server:app --port 9000
+#   GROQ_BASE_URL=http://127.0.0.1:9000 GROQ_API_KEY=test uvicorn main:app
+
+import asyncio
+import json
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+FIRST_TOKEN_DELAY = float(os.getenv("MOCK_FIRST_TOKEN_DELAY", "0.3"))
+TOKEN_DELAY = float(os.getenv("MOCK_TOKEN_DELAY", "0.02"))
+ANSWER_TOKENS = int(os.getenv("MOCK_ANSWER_TOKENS", "50"))
+
+app = FastAPI()
+stats = {"in_flight": 0, "max_in_flight": 0, "requests": 0}
+
+
+def _chunk(model, content=None, finish_reason=None):
+    delta = {"content": content} if content is not None else {}
+    return {
+        "id": "mock",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "mock")
+    tokens = [f"tok{i} " for i in range(ANSWER_TOKENS)]
+
+    stats["requests"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+
+    if not body.get("stream"):
+        try:
+            await asyncio.sleep(FIRST_TOKEN_DELAY + TOKEN_DELAY * ANSWER_TOKENS)
+        finally:
+            stats["in_flight"] -= 1
+        return {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": ANSWER_TOKENS, "total_tokens": ANSWER_TOKENS},
+        }
+
+    async def stream():
+        try:
+            await asyncio.sleep(FIRST_TOKEN_DELAY)
+            for token in tokens:
+                yield f"data: {json.dumps(_chunk(model, token))}\n\n"
+                await asyncio.sleep(TOKEN_DELAY)
+            final = _chunk(model, finish_reason="stop")
+            final["x_groq"] = {"id": "mock", "usage": {
+                "prompt_tokens": 0, "completion_tokens": ANSWER_TOKENS, "total_tokens": ANSWER_TOKENS,
+            }}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            stats["in_flight"] -= 1
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
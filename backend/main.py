@@ -1,32 +1,102 @@
 from fastapi import FastAPI, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
 
 import os
+import importlib.util
 import json
 import logging
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
 from dotenv import load_dotenv
-from groq import Groq
+from groq import AsyncGroq
+import xxhash
 
-from services.pdf_reader import extract_text_from_pdf
-from services.chunker import chunk_text
-
-# Load ENV
+# Load ENV before the service imports: several of them read settings at import time
 env_path = os.path.join(os.path.dirname(__file__), ".env")
 load_dotenv(env_path)
 
+from services.pdf_reader import iter_pdf_pages, shutdown_pool
+from services.chunker import chunk_pages
+from services.bm25_index import BM25Index
+from services.chunk_store import ChunkStore
+from services.llm_client import LLMBusyError, llm_limiter, make_async_http_client
+from services.answer_cache import AnswerCache
+from services.metrics import (
+    CHUNKS, LLM_TOKENS, current_trace, format_server_timing, record_stage, render_metrics, timed,
+)
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 if not GROQ_API_KEY:
     raise Exception("GROQ_API_KEY not found in .env")
 
-groq_client = Groq(api_key=GROQ_API_KEY)
+GROQ_MODEL = "llama-3.1-8b-instant"
+
+# Shared across requests so upstream connections are pooled and kept alive
+groq_client = AsyncGroq(api_key=GROQ_API_KEY, http_client=make_async_http_client())
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+LEGACY_DATA_FILE = os.path.join(DATA_DIR, "chunks.json")
+INDEX_FILE = os.path.join(DATA_DIR, "bm25_index.json")
+os.makedirs(DATA_DIR, exist_ok=True)
+
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "50"))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+# Cosine similarity above which a cached answer is reused for a reworded question.
+# Unset disables the semantic tier (and the query embedding it needs).
+ANSWER_CACHE_SEMANTIC_THRESHOLD = os.getenv("ANSWER_CACHE_SEMANTIC_THRESHOLD")
+
+answer_cache = AnswerCache(
+    max_items=ANSWER_CACHE_SIZE,
+    ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+    semantic_threshold=float(ANSWER_CACHE_SEMANTIC_THRESHOLD) if ANSWER_CACHE_SEMANTIC_THRESHOLD else None,
+)
+
+# sentence-transformers (and torch) is only imported when the semantic tier is on
+if answer_cache.semantic_threshold is not None and importlib.util.find_spec("sentence_transformers") is None:
+    raise Exception("ANSWER_CACHE_SEMANTIC_THRESHOLD requires sentence-transformers")
+
+_query_encoder = None
+_query_encoder_lock = threading.Lock()
+
+def encode_query(q):
+    global _query_encoder
+    # under the lock so concurrent first requests load the model only once
+    with _query_encoder_lock:
+        if _query_encoder is None:
+            from sentence_transformers import SentenceTransformer
+            _query_encoder = SentenceTransformer("all-MiniLM-L6-v2")
+    return _query_encoder.encode(q)
 
-DATA_FILE = os.path.join(os.path.dirname(__file__), "data/chunks.json")
-os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
+async def cached_answer(q, chunk_ids):
+    """
+    Return (cached answer or None, query embedding or None). The query is only
+    embedded after an exact miss, and only when the semantic tier is on.
+    """
+    cached = answer_cache.get(q, chunk_ids)
+    if cached is not None or answer_cache.semantic_threshold is None:
+        return cached, None
+    q_vector = await run_in_threadpool(encode_query, q)
+    return answer_cache.get_similar(q_vector, chunk_ids), q_vector
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await groq_client.close()
+    shutdown_pool()
 
 # FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,73 +104,298 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Trace-Id"],
 )
 
+class TraceMiddleware:
+    """
+    With an "X-Trace: 1" request header, stage timings of this request are returned
+    in a Server-Timing header (and, for /ask/stream, in the final "done" event).
+    Plain ASGI, so untraced requests (and streamed bodies) pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        if headers.get("x-trace", "").lower() not in ("1", "true", "yes"):
+            return await self.app(scope, receive, send)
+
+        trace = []
+        trace_id = headers.get("x-request-id") or uuid.uuid4().hex
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                response_headers["X-Trace-Id"] = trace_id
+                # a streamed body is still running here; its later stages are in the done event
+                if trace:
+                    response_headers["Server-Timing"] = format_server_timing(trace)
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+
+app.add_middleware(TraceMiddleware)
+
 class AskBody(BaseModel):
     query: str
+    # uploaded document to answer from; defaults to the latest upload
+    doc_id: Optional[int] = None
 
-def save_chunks(chunks):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(chunks, f, indent=2)
-
-def load_chunks():
-    if not os.path.exists(DATA_FILE):
+# Legacy single-document store, imported into the chunk store on first start
+def load_legacy_chunks():
+    if not os.path.exists(LEGACY_DATA_FILE):
         return []
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
+    with open(LEGACY_DATA_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
+chunk_store = ChunkStore(DATA_DIR)
+if not len(chunk_store):
+    legacy_chunks = load_legacy_chunks()
+    if legacy_chunks:
+        chunk_store.append("chunks.json", legacy_chunks)
+
+# BM25 index is extended on every upload and kept in memory between /ask calls.
+# Its doc ids are chunk store ids.
+_bm25_index = None
+_index_lock = threading.Lock()
+# serializes uploads so store chunk ids and index doc ids stay aligned
+_ingest_lock = threading.Lock()
+
+def load_index():
+    global _bm25_index
+    with _index_lock:
+        if _bm25_index is not None:
+            return _bm25_index
+        index = BM25Index.load(INDEX_FILE)
+        # missing or out of sync with the store: rebuild from the stored chunks
+        if len(index) != len(chunk_store):
+            index = BM25Index()
+            index.add(chunk_store.iter_texts())
+            index.save(INDEX_FILE)
+        _bm25_index = index
+        return _bm25_index
+
+def stored_document(document):
+    chunk_ids = range(document["start"], document["start"] + document["count"])
+    return document["id"], chunk_store.get_many(chunk_ids), [chunk_store.page(i) for i in chunk_ids]
+
+def ingest_pdf(name, pdf_bytes):
+    """
+    Extract, chunk, store and index a PDF. Blocking; run it off the event loop.
+    Pages are chunked as they come out of the extraction pool. A PDF that was
+    already uploaded (same bytes) is not stored again.
+    """
+    content_hash = xxhash.xxh3_128_hexdigest(pdf_bytes)
+    existing = chunk_store.find(content_hash)
+    if existing is not None:
+        return stored_document(existing)
+
+    chunks, pages = [], []
+    for page, chunk in chunk_pages(iter_pdf_pages(pdf_bytes)):
+        chunks.append(chunk)
+        pages.append(page)
+
+    with _ingest_lock, timed("index_update"):
+        # the same PDF may have been stored by a concurrent upload meanwhile
+        existing = chunk_store.find(content_hash)
+        if existing is not None:
+            return stored_document(existing)
+        # sync the index before the store grows so the new chunks are added exactly once
+        index = load_index()
+        doc_id, _ = chunk_store.append(name, chunks, pages, content_hash)
+        index.add(chunks)
+        # appends only the new postings to the index log
+        index.flush(INDEX_FILE)
+    CHUNKS.inc(len(chunks))
+    return doc_id, chunks, pages
+
 @app.post("/extract")
 async def extract_endpoint(file: UploadFile = File(...)):
     try:
-        pdf_bytes = await file.read()
-        text = extract_text_from_pdf(pdf_bytes)
-        chunks = chunk_text(text)
+        pdf_bytes = await file.read(MAX_UPLOAD_BYTES + 1)
+        if len(pdf_bytes) > MAX_UPLOAD_BYTES:
+            return {"error": f"PDF is larger than {MAX_UPLOAD_MB} MB"}
 
-        save_chunks(chunks)
-        return {"chunks": chunks, "message": "PDF extracted successfully!"}
+        doc_id, chunks, pages = await run_in_threadpool(
+            ingest_pdf, file.filename or "upload.pdf", pdf_bytes
+        )
+        # retrieval results (and so cached answers) change with the corpus
+        answer_cache.clear()
+        return {
+            "doc_id": doc_id,
+            "chunks": chunks,
+            "pages": pages,
+            "message": "PDF extracted successfully!",
+        }
 
     except Exception as e:
         logging.exception("Error in /extract")
         return {"error": str(e)}
 
+def find_document(doc_id=None):
+    """
+    The stored document with this id, or the latest upload when doc_id is None.
+    None if there is no such document.
+    """
+    documents = chunk_store.documents()
+    if doc_id is None:
+        return documents[-1] if documents else None
+    if 0 <= doc_id < len(documents):
+        return documents[doc_id]
+    return None
+
+def retrieve_context(q, document, top_k=5):
+    """
+    Return (chunk ids, context text) for the best matching chunks of one document.
+    Blocking (the first call may load or rebuild the index); run it off the event loop.
+    """
+    start, stop = document["start"], document["start"] + document["count"]
+    with timed("retrieval"):
+        hits = load_index().search(q, top_k=top_k, id_range=(start, stop))
+        if hits:
+            chunk_ids = [doc_id for doc_id, _ in hits]
+        else:
+            chunk_ids = list(range(start, min(start + top_k, stop)))
+        return chunk_ids, "\n\n".join(chunk_store.get_many(chunk_ids))
+
+def build_messages(context, q):
+    with timed("prompt_build"):
+        return [
+            {
+                "role": "system",
+                "content": "You answer strictly using the context from the uploaded PDF."
+            },
+            {
+                "role": "user",
+                "content": f"PDF Context:\n{context}\n\nQuestion: {q}"
+            }
+        ]
+
+def count_tokens(usage):
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens, kind="prompt")
+        LLM_TOKENS.inc(usage.completion_tokens, kind="completion")
+
+def done_event():
+    trace = current_trace.get()
+    if trace is None:
+        return sse_event({"done": True})
+    return sse_event({"done": True, "trace": {stage: round(s * 1000, 2) for stage, s in trace}})
+
+def sse_event(payload):
+    return f"data: {json.dumps(payload)}\n\n"
+
 @app.post("/ask")
 async def ask_question(body: AskBody):
     try:
         q = body.query.strip()
-        print("User Query:", q)
+        logging.debug("User query: %s", q)
 
-        chunks = load_chunks()
-        if not chunks:
+        document = find_document(body.doc_id)
+        if document is None and body.doc_id is not None:
+            return {"error": f"No document with doc_id {body.doc_id}"}
+        if document is None:
             return {"answer": "No PDF extracted yet. Please upload a PDF first."}
 
-        q_words = [w.lower() for w in q.split() if len(w) > 2]
-
-        scored = []
-        for chunk in chunks:
-            score = sum(w in chunk.lower() for w in q_words)
-            scored.append((score, chunk))
-
-        scored.sort(reverse=True, key=lambda x: x[0])
-        best_chunks = [c for s, c in scored[:5]]
-
-        context = "\n\n".join(best_chunks)
-
-        completion = groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You answer strictly using the context from the uploaded PDF."
-                },
-                {
-                    "role": "user",
-                    "content": f"PDF Context:\n{context}\n\nQuestion: {q}"
-                }
-            ]
-        )
+        generation = answer_cache.generation
+        chunk_ids, context = await run_in_threadpool(retrieve_context, q, document)
+        cached, q_vector = await cached_answer(q, chunk_ids)
+        if cached is not None:
+            return {"answer": cached}
 
-        return {"answer": completion.choices[0].message.content}
+        messages = build_messages(context, q)
+        async with llm_limiter.slot():
+            with timed("llm"):
+                completion = await groq_client.chat.completions.create(
+                    model=GROQ_MODEL,
+                    messages=messages,
+                )
+
+        count_tokens(completion.usage)
+        answer = completion.choices[0].message.content
+        answer_cache.put(q, chunk_ids, answer, q_vector, generation)
+        return {"answer": answer}
+
+    except LLMBusyError as e:
+        return {"error": str(e)}
 
     except Exception as e:
         logging.exception("Error in /ask")
         return {"error": str(e)}
+
+@app.post("/ask/stream")
+async def ask_question_stream(body: AskBody):
+    """
+    Same as /ask, but streams the answer as server-sent events:
+    {"token": ...} per delta, then {"done": true}, or {"error": ...}.
+    """
+    q = body.query.strip()
+    logging.debug("User query: %s", q)
+
+    async def events():
+        try:
+            document = find_document(body.doc_id)
+            if document is None and body.doc_id is not None:
+                yield sse_event({"error": f"No document with doc_id {body.doc_id}"})
+                return
+            if document is None:
+                yield sse_event({"token": "No PDF extracted yet. Please upload a PDF first."})
+                yield done_event()
+                return
+
+            generation = answer_cache.generation
+            chunk_ids, context = await run_in_threadpool(retrieve_context, q, document)
+            cached, q_vector = await cached_answer(q, chunk_ids)
+            if cached is not None:
+                yield sse_event({"token": cached})
+                yield done_event()
+                return
+
+            messages = build_messages(context, q)
+            tokens = []
+            async with llm_limiter.slot():
+                with timed("llm"):
+                    start = time.perf_counter()
+                    stream = await groq_client.chat.completions.create(
+                        model=GROQ_MODEL,
+                        messages=messages,
+                        stream=True,
+                    )
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            if not tokens:
+                                record_stage("llm_first_token", time.perf_counter() - start)
+                            tokens.append(chunk.choices[0].delta.content)
+                            yield sse_event({"token": tokens[-1]})
+                        # Groq reports usage on the final chunk
+                        if chunk.x_groq is not None:
+                            count_tokens(chunk.x_groq.usage)
+
+            # only complete answers are cached
+            answer_cache.put(q, chunk_ids, "".join(tokens), q_vector, generation)
+            yield done_event()
+
+        except LLMBusyError as e:
+            yield sse_event({"error": str(e)})
+
+        except Exception as e:
+            logging.exception("Error in /ask/stream")
+            yield sse_event({"error": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,127 @@
+# backend/services/answer_cache.py
+
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.metrics import CACHE_LOOKUPS
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    return _SPACE_RE.sub(" ", query.lower()).strip(" ?!.")
+
+
+class AnswerCache:
+    """
+    TTL + LRU cache of LLM answers.
+
+    The exact tier (get) is keyed on the normalized query plus the ids of the
+    context chunks it was answered from. When semantic_threshold is set, an exact
+    miss can fall back to get_similar: the cached entry whose query embedding has
+    the highest cosine similarity, if that reaches the threshold. Only entries
+    answered from (nearly) the same chunks are candidates, at least
+    semantic_min_overlap of the ids shared, so a similar question about another
+    document never gets its answer. clear() must be called whenever the corpus
+    changes.
+    """
+
+    def __init__(self, max_items: int = 1024, ttl_seconds: float = 3600,
+                 semantic_threshold: Optional[float] = None,
+                 semantic_min_overlap: float = 0.8):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self.semantic_min_overlap = semantic_min_overlap
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        # bumped by clear(), so answers computed against an older corpus are not stored
+        self.generation = 0
+        # key -> (expires_at, answer, normalized query embedding or None);
+        # key[1] holds the chunk ids the answer was written from
+        self._entries: "OrderedDict[Tuple, Tuple[float, str, Optional[np.ndarray]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(query: str, chunk_ids: Sequence[int]) -> Tuple:
+        return (normalize_query(query), tuple(chunk_ids))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.generation += 1
+
+    def _semantic_lookup(self, query_vector: np.ndarray, chunk_ids: Sequence[int],
+                         now: float) -> Optional[Tuple]:
+        keys = [k for k, (expires_at, _, v) in self._entries.items()
+                if v is not None and expires_at > now
+                and _overlap(k[1], chunk_ids) >= self.semantic_min_overlap]
+        if not keys:
+            return None
+        matrix = np.vstack([self._entries[k][2] for k in keys])
+        scores = matrix @ query_vector
+        best = int(np.argmax(scores))
+        if scores[best] >= self.semantic_threshold:
+            return keys[best]
+        return None
+
+    def get(self, query: str, chunk_ids: Sequence[int]) -> Optional[str]:
+        now = time.monotonic()
+        key = self.key(query, chunk_ids)
+        entry = self._entries.get(key)
+        # expired entries are dropped lazily, when looked up or pushed out by LRU
+        if entry is not None and entry[0] <= now:
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache="answer", result="hit")
+            return entry[1]
+
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache="answer", result="miss")
+        return None
+
+    def get_similar(self, query_vector, chunk_ids: Sequence[int]) -> Optional[str]:
+        """
+        Semantic tier, for after an exact miss. Always None when semantic_threshold is unset.
+        """
+        if self.semantic_threshold is None:
+            return None
+        match = self._semantic_lookup(_unit(query_vector), chunk_ids, time.monotonic())
+        if match is None:
+            CACHE_LOOKUPS.inc(cache="answer", result="semantic_miss")
+            return None
+        self._entries.move_to_end(match)
+        self.semantic_hits += 1
+        CACHE_LOOKUPS.inc(cache="answer", result="semantic_hit")
+        return self._entries[match][1]
+
+    def put(self, query: str, chunk_ids: Sequence[int], answer: str,
+            query_vector=None, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        key = self.key(query, chunk_ids)
+        vector = _unit(query_vector) if query_vector is not None else None
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, answer, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _overlap(a: Sequence[int], b: Sequence[int]) -> float:
+    a, b = set(a), set(b)
+    return len(a & b) / max(len(a), len(b), 1)
@@ -0,0 +1,159 @@
+# backend/services/bm25_index.py
+
+import heapq
+from bisect import bisect_left
+import json
+import math
+import os
+import re
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens, dropping very short words (same cut-off /ask always used).
+    """
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 2]
+
+
+class BM25Index:
+    """
+    Inverted index over chunk texts, scored with Okapi BM25.
+
+    Doc ids are assigned sequentially as documents are added, so they line up with
+    the position of each chunk in the chunk store.
+
+    On disk the index is a JSON snapshot plus an append-only "<path>.log" of the
+    documents added since: flush() only writes the new documents, and folds the
+    log into a fresh snapshot once it holds more than half of the index.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> list of (doc_id, term frequency)
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lens: List[int] = []
+        self.total_len = 0
+        # (doc length, term frequencies) of documents not yet written to disk
+        self._unsaved: List[Tuple[int, Dict[str, int]]] = []
+        # documents currently in the log file rather than the snapshot
+        self._logged = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lens)
+
+    def add(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            doc_id = len(self.doc_lens)
+            tokens = tokenize(text)
+            tf: Dict[str, int] = {}
+            for t in tokens:
+                tf[t] = tf.get(t, 0) + 1
+            self._add_document(doc_id, len(tokens), tf)
+            self._unsaved.append((len(tokens), tf))
+
+    def _add_document(self, doc_id: int, doc_len: int, tf: Dict[str, int]) -> None:
+        # doc length first: a concurrent search may see the new postings
+        self.doc_lens.append(doc_len)
+        self.total_len += doc_len
+        for term, freq in tf.items():
+            self.postings.setdefault(term, []).append((doc_id, freq))
+
+    def search(self, query: str, top_k: int = 5,
+               id_range: Optional[Tuple[int, int]] = None) -> List[Tuple[int, float]]:
+        """
+        Return up to top_k (doc_id, score) pairs, best first. Only documents sharing
+        at least one term with the query are scored. With id_range=(start, stop) only
+        doc ids in that half-open range are considered (e.g. the chunks of one
+        uploaded PDF); postings are in id order, so the range is found by bisection.
+        """
+        n_docs = len(self.doc_lens)
+        if not n_docs:
+            return []
+
+        k1, b = self.k1, self.b
+        avgdl = (self.total_len / n_docs) or 1.0
+        doc_lens = self.doc_lens
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            if id_range is not None:
+                lo = bisect_left(postings, id_range[0], key=itemgetter(0))
+                hi = bisect_left(postings, id_range[1], key=itemgetter(0))
+                postings = postings[lo:hi]
+            for doc_id, tf in postings:
+                norm = k1 * (1 - b + b * doc_lens[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=itemgetter(1))
+
+    def save(self, path: str) -> None:
+        """
+        Write a full snapshot and drop the log.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "doc_lens": self.doc_lens,
+                "postings": self.postings,
+            }, f)
+        os.replace(tmp_path, path)
+        if os.path.exists(path + ".log"):
+            os.remove(path + ".log")
+        self._unsaved = []
+        self._logged = 0
+
+    def flush(self, path: str) -> None:
+        """
+        Persist documents added since the last save or flush. Costs O(new documents)
+        except when the log is compacted, which happens after the index has grown by
+        half, so the full rewrites stay amortized O(1) per document.
+        """
+        if not os.path.exists(path) or self._logged + len(self._unsaved) > len(self.doc_lens) // 2:
+            self.save(path)
+            return
+        with open(path + ".log", "a", encoding="utf-8") as f:
+            for doc_len, tf in self._unsaved:
+                f.write(json.dumps([doc_len, tf]) + "\n")
+        self._logged += len(self._unsaved)
+        self._unsaved = []
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index.k1 = data["k1"]
+        index.b = data["b"]
+        index.doc_lens = data["doc_lens"]
+        index.total_len = sum(index.doc_lens)
+        index.postings = {
+            term: [(doc_id, tf) for doc_id, tf in postings]
+            for term, postings in data["postings"].items()
+        }
+
+        log_path = path + ".log"
+        if os.path.exists(log_path):
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        doc_len, tf = json.loads(line)
+                    except ValueError:
+                        # torn trailing line from an interrupted flush
+                        break
+                    index._add_document(len(index.doc_lens), doc_len, tf)
+                    index._logged += 1
+        return index
@@ -0,0 +1,204 @@
+# backend/services/chunk_store.py
+
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# chunks.bin holds length-prefixed UTF-8 segments: <uint32 length><bytes>
+_LEN = struct.Struct("<I")
+# chunks.idx starts with a <magic, version> header, then holds one fixed-size record
+# per chunk: <payload offset, length, doc id, page>
+_HEADER = struct.Struct("<4sI")
+_MAGIC = b"NDCI"
+_VERSION = 1
+_IDX = struct.Struct("<QIII")
+
+
+class ChunkStore:
+    """
+    Append-only chunk store backed by a memory-mapped data file and an offset index.
+
+    Chunk ids are global and sequential across documents, so chunk N is always the
+    N-th chunk ever appended. The offset index is loaded once and cached in memory;
+    appends invalidate the cache and the data mapping.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.data_path = os.path.join(directory, "chunks.bin")
+        self.index_path = os.path.join(directory, "chunks.idx")
+        self.docs_path = os.path.join(directory, "documents.json")
+        self._lock = threading.Lock()
+        self._offsets = None
+        self._lengths = None
+        self._doc_ids = None
+        self._pages = None
+        self._documents = None
+        self._file = None
+        self._mm = None
+
+    # -- cache management --
+
+    def _invalidate(self) -> None:
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # a caller still holds a view from get_bytes; the mapping is
+                # released once that view goes away
+                pass
+            self._file.close()
+        self._mm = None
+        self._file = None
+        self._offsets = None
+        self._lengths = None
+        self._doc_ids = None
+        self._pages = None
+        self._documents = None
+
+    def _load_index(self) -> None:
+        offsets, lengths, doc_ids, pages = array("Q"), array("I"), array("I"), array("I")
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                raw = f.read()
+            # shorter than the header: torn by an interrupted first append
+            if len(raw) >= _HEADER.size:
+                magic, version = _HEADER.unpack_from(raw)
+                if magic != _MAGIC or version != _VERSION:
+                    raise ValueError(f"{self.index_path} is not a version {_VERSION} chunk index")
+            raw = raw[_HEADER.size:]
+            # ignore a torn trailing record from an interrupted append
+            raw = raw[: len(raw) - len(raw) % _IDX.size]
+            for offset, length, doc_id, page in _IDX.iter_unpack(raw):
+                offsets.append(offset)
+                lengths.append(length)
+                doc_ids.append(doc_id)
+                pages.append(page)
+        self._offsets, self._lengths, self._doc_ids, self._pages = offsets, lengths, doc_ids, pages
+
+    def _ensure_loaded(self) -> None:
+        if self._offsets is None:
+            self._load_index()
+        if self._mm is None and self._offsets:
+            self._file = open(self.data_path, "rb")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # -- writes --
+
+    def append(self, name: str, chunks: List[str], pages: Optional[List[int]] = None,
+               content_hash: Optional[str] = None) -> Tuple[int, List[int]]:
+        """
+        Append a document's chunks, optionally with the page number of each chunk
+        (0 when unknown) and a hash of the source file for find(). Returns
+        (doc_id, chunk ids).
+        """
+        if pages is None:
+            pages = [0] * len(chunks)
+        with self._lock:
+            documents = self._load_documents()
+            doc_id = len(documents)
+            if self._offsets is None:
+                self._load_index()
+            start = len(self._offsets)
+
+            data_size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+            data_buf = bytearray()
+            index_buf = bytearray()
+            for chunk, page in zip(chunks, pages):
+                encoded = chunk.encode("utf-8")
+                data_buf += _LEN.pack(len(encoded))
+                index_buf += _IDX.pack(data_size + len(data_buf), len(encoded), doc_id, page)
+                data_buf += encoded
+
+            # data first, then index: a crash in between leaves unreferenced bytes only
+            with open(self.data_path, "ab") as f:
+                f.write(data_buf)
+            with open(self.index_path, "ab") as f:
+                if f.tell() < _HEADER.size:
+                    f.truncate(0)
+                    f.write(_HEADER.pack(_MAGIC, _VERSION))
+                else:
+                    # drop a torn trailing record so the new records stay aligned
+                    f.truncate(_HEADER.size + start * _IDX.size)
+                f.write(index_buf)
+
+            document = {"id": doc_id, "name": name, "start": start, "count": len(chunks)}
+            if content_hash:
+                document["hash"] = content_hash
+            documents.append(document)
+            tmp_path = self.docs_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(documents, f)
+            os.replace(tmp_path, self.docs_path)
+
+            self._invalidate()
+            return doc_id, list(range(start, start + len(chunks)))
+
+    # -- reads --
+
+    def __len__(self) -> int:
+        # reads of the cached index go through the lock: an append invalidates it,
+        # and a load racing that append could otherwise reinstate stale arrays
+        with self._lock:
+            if self._offsets is None:
+                self._load_index()
+            return len(self._offsets)
+
+    def _load_documents(self) -> List[Dict]:
+        if self._documents is None:
+            if os.path.exists(self.docs_path):
+                with open(self.docs_path, "r", encoding="utf-8") as f:
+                    self._documents = json.load(f)
+            else:
+                self._documents = []
+        return self._documents
+
+    def documents(self) -> List[Dict]:
+        with self._lock:
+            return list(self._load_documents())
+
+    def find(self, content_hash: str) -> Optional[Dict]:
+        """
+        The document previously appended with this content hash, if any.
+        """
+        with self._lock:
+            for document in self._load_documents():
+                if document.get("hash") == content_hash:
+                    return document
+        return None
+
+    def get_bytes(self, chunk_id: int) -> memoryview:
+        """
+        Zero-copy view of a chunk's UTF-8 bytes inside the mapped data file.
+        """
+        # under the lock so a concurrent append cannot unmap the file mid-read
+        with self._lock:
+            self._ensure_loaded()
+            offset = self._offsets[chunk_id]
+            return memoryview(self._mm)[offset: offset + self._lengths[chunk_id]]
+
+    def get(self, chunk_id: int) -> str:
+        return str(self.get_bytes(chunk_id), "utf-8")
+
+    def get_many(self, chunk_ids: Iterable[int]) -> List[str]:
+        return [self.get(i) for i in chunk_ids]
+
+    def doc_id(self, chunk_id: int) -> int:
+        with self._lock:
+            if self._doc_ids is None:
+                self._load_index()
+            return self._doc_ids[chunk_id]
+
+    def page(self, chunk_id: int) -> int:
+        with self._lock:
+            if self._pages is None:
+                self._load_index()
+            return self._pages[chunk_id]
+
+    def iter_texts(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.get(i)
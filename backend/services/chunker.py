@@ -1,6 +1,12 @@
 # backend/services/chunker.py
 
-from typing import List
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from services.metrics import Stopwatch
 
 # Try to import RecursiveCharacterTextSplitter from langchain_text_splitters if available
 try:
@@ -9,32 +15,142 @@ try:
 except Exception:
     _HAS_LANGCHAIN_SPLITTER = False
 
-def chunk_text(text: str, chunk_size: int = 800, chunk_overlap: int = 100) -> List[str]:
+# tiktoken is only needed for token-based sizing
+try:
+    import tiktoken
+    _HAS_TIKTOKEN = True
+except Exception:
+    _HAS_TIKTOKEN = False
+
+# Below this many documents chunk_documents stays in-process
+MIN_DOCS_FOR_POOL = 8
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str):
+    if not _HAS_TIKTOKEN:
+        raise ImportError("token-based chunking requires tiktoken")
+    return tiktoken.get_encoding(encoding_name)
+
+
+def _chunk_words(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """
+    Greedy word chunking in linear time. `length` is always len(" ".join(words[start:i])),
+    updated incrementally as words enter and leave the window. After each chunk the
+    window keeps a tail of at most chunk_overlap characters as the next chunk's start.
+    """
+    words = text.split()
+    chunks = []
+    start = 0
+    length = 0
+    for i, w in enumerate(words):
+        if i > start and length + 1 + len(w) > chunk_size:
+            chunks.append(" ".join(words[start:i]))
+            # drop words from the front until the tail fits the overlap and leaves room for w
+            while start < i and (length > chunk_overlap or length + 1 + len(w) > chunk_size):
+                length -= len(words[start]) + (1 if start + 1 < i else 0)
+                start += 1
+        length += len(w) + (1 if i > start else 0)
+
+    if start < len(words):
+        chunks.append(" ".join(words[start:]))
+    return chunks
+
+
+def _chunk_tokens(text: str, chunk_size: int, chunk_overlap: int, encoding_name: str) -> List[str]:
+    """
+    Windows of at most chunk_size tokens, consecutive windows sharing at most
+    chunk_overlap tokens. A character can span several byte-level tokens, so window
+    edges are moved onto token boundaries that are also character boundaries;
+    cutting elsewhere would decode half a character as U+FFFD.
+    """
+    encoding = _get_encoding(encoding_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    n = len(tokens)
+
+    def at_char_boundary(k: int) -> bool:
+        # a token starting with a UTF-8 continuation byte continues the previous character
+        return k <= 0 or k >= n or not 0x80 <= encoding.decode_single_token_bytes(tokens[k])[0] < 0xC0
+
+    chunks = []
+    start = 0
+    while start < n:
+        end = min(start + chunk_size, n)
+        while end > start + 1 and not at_char_boundary(end):
+            end -= 1
+        chunks.append(encoding.decode(tokens[start:end]))
+        if end >= n:
+            break
+        next_start = end - chunk_overlap
+        while next_start < end and not at_char_boundary(next_start):
+            next_start += 1
+        start = next_start if next_start > start else end
+    return chunks
+
+
+def chunk_text(text: str, chunk_size: int = 800, chunk_overlap: int = 100,
+               encoding_name: Optional[str] = None) -> List[str]:
     """
     Return list of chunks. Prefer langchain's splitter if installed, else fallback to a simple word-based chunker.
+    With encoding_name (a tiktoken encoding such as "cl100k_base") sizes are counted in tokens instead of characters.
     """
     if not text:
         return []
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
 
     if _HAS_LANGCHAIN_SPLITTER:
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-        )
+        if encoding_name:
+            splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+                encoding_name=encoding_name,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+            )
+        else:
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=len,
+            )
         return splitter.split_text(text)
 
-    # fallback: word-based greedy chunking
-    words = text.split()
-    chunks = []
-    current = []
-    for w in words:
-        if len(" ".join(current + [w])) > chunk_size:
-            chunks.append(" ".join(current))
-            current = [w]
-        else:
-            current.append(w)
+    if encoding_name:
+        return _chunk_tokens(text, chunk_size, chunk_overlap, encoding_name)
+    return _chunk_words(text, chunk_size, chunk_overlap)
 
-    if current:
-        chunks.append(" ".join(current))
-    return chunks
+
+def chunk_documents(texts: List[str], chunk_size: int = 800, chunk_overlap: int = 100,
+                    encoding_name: Optional[str] = None,
+                    workers: Optional[int] = None) -> List[List[str]]:
+    """
+    chunk_text over many documents, spread across a process pool. Returns one list of
+    chunks per input text, in input order.
+    """
+    split = partial(chunk_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                    encoding_name=encoding_name)
+    if len(texts) < MIN_DOCS_FOR_POOL or workers == 1:
+        return [split(text) for text in texts]
+
+    workers = workers or os.cpu_count() or 2
+    # a few batches per worker keeps the pool busy without paying IPC per document
+    batch = max(1, len(texts) // (workers * 4))
+    # forkserver: callers may be multi-threaded, and forking those can deadlock
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("forkserver")) as pool:
+        return list(pool.map(split, texts, chunksize=batch))
+
+
+def chunk_pages(pages: Iterable[Tuple[int, str]], chunk_size: int = 800,
+                chunk_overlap: int = 100, encoding_name: Optional[str] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Chunk a stream of (page_number, text) pairs as they arrive, yielding
+    (page_number, chunk). Chunks never span a page boundary.
+    """
+    stopwatch = Stopwatch()
+    for page_number, text in pages:
+        with stopwatch:
+            chunks = chunk_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                encoding_name=encoding_name)
+        for chunk in chunks:
+            yield page_number, chunk
+    stopwatch.record("chunking")
@@ -0,0 +1,158 @@
+# backend/services/embedding_cache.py
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import xxhash
+
+from services.metrics import CACHE_LOOKUPS
+
+# an empty value (e.g. "EMBEDDING_CACHE_DIR=" copied from .env.example) means unset
+DEFAULT_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "data", "embedding_cache"
+)
+DEFAULT_MAX_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS") or 20000)
+DEFAULT_MAX_DISK_MB = int(os.getenv("EMBEDDING_CACHE_DISK_MB") or 512)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache: an in-memory LRU in front of an on-disk tier.
+
+    Keys are xxh3-128 hashes of the model name and the chunk text, so the same text
+    embedded by a different model never collides. Vectors are stored as raw float32.
+    The disk tier evicts least recently used files once it grows past max_disk_bytes;
+    directory=None keeps the cache in memory only.
+    """
+
+    def __init__(self, model_name: str, directory: Optional[str] = DEFAULT_CACHE_DIR,
+                 max_memory_items: int = DEFAULT_MAX_MEMORY_ITEMS,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_MB * 1024 * 1024):
+        self.model_name = model_name
+        self.directory = directory
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(e.stat().st_size for e in os.scandir(directory) if e.is_file())
+
+    def key(self, text: str) -> str:
+        return xxhash.xxh3_128_hexdigest(self.model_name.encode("utf-8") + b"\0" + text.encode("utf-8"))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_items": len(self._memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    # -- tiers --
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".f32")
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[np.ndarray]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                vector = np.frombuffer(f.read(), dtype=np.float32)
+            # bump mtime so eviction treats it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return vector
+
+    def _write_disk(self, key: str, vector: np.ndarray) -> None:
+        if not self.directory:
+            return
+        data = vector.tobytes()
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._disk_bytes += len(data)
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        # drop the oldest files until we are back under 90% of the budget
+        entries = sorted(
+            (e for e in os.scandir(self.directory) if e.is_file()),
+            key=lambda e: e.stat().st_mtime,
+        )
+        target = int(self.max_disk_bytes * 0.9)
+        total = sum(e.stat().st_size for e in entries)
+        for entry in entries:
+            if total <= target:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+    # -- public API --
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        results: List[Optional[np.ndarray]] = []
+        hits = 0
+        with self._lock:
+            for text in texts:
+                key = self.key(text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                else:
+                    vector = self._read_disk(key)
+                    if vector is not None:
+                        self._remember(key, vector)
+                if vector is not None:
+                    hits += 1
+                results.append(vector)
+            self.hits += hits
+            self.misses += len(texts) - hits
+        CACHE_LOOKUPS.inc(hits, cache="embedding", result="hit")
+        CACHE_LOOKUPS.inc(len(texts) - hits, cache="embedding", result="miss")
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors) -> None:
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                vector = np.array(vector, dtype=np.float32)
+                self._remember(key, vector)
+                self._write_disk(key, vector)
+
+    def embed(self, texts: Sequence[str], compute: Callable[[List[str]], Sequence]) -> List[np.ndarray]:
+        """
+        Return one float32 vector per text. Only cache misses are passed to compute,
+        each distinct text once, in a single batch.
+        """
+        results = self.get_many(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, results) if v is None))
+        if missing:
+            computed = compute(missing)
+            self.put_many(missing, computed)
+            fresh = dict(zip(missing, (np.asarray(v, dtype=np.float32) for v in computed)))
+            results = [v if v is not None else fresh[t] for t, v in zip(texts, results)]
+        return results
@@ -1,9 +1,17 @@
 from langchain_openai import OpenAIEmbeddings
 
-embeddings_model = OpenAIEmbeddings(model="text-embedding-3-small")
+from services.embedding_cache import EmbeddingCache
+from services.metrics import timed
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+embeddings_model = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+embedding_cache = EmbeddingCache(EMBEDDING_MODEL)
 
 def embed_chunks(chunks):
-    return embeddings_model.embed_documents(chunks)
+    with timed("embedding"):
+        vectors = embedding_cache.embed(chunks, embeddings_model.embed_documents)
+    return [v.tolist() for v in vectors]
 
 def embed_query(query):
-    return embeddings_model.embed_query(query)
\ No newline at end of file
+    return embeddings_model.embed_query(query)
@@ -0,0 +1,68 @@
+# backend/services/llm_client.py
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import httpx
+
+# At most LLM_MAX_CONCURRENCY upstream calls run at once; up to LLM_MAX_QUEUE more
+# may wait for a slot. Anything beyond that is rejected straight away.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY") or 8)
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE") or 64)
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS") or 60)
+
+
+class LLMBusyError(Exception):
+    pass
+
+
+class ConcurrencyLimiter:
+    """
+    Semaphore with a bounded wait queue, for capping in-flight upstream requests.
+    """
+
+    def __init__(self, max_concurrent: int, max_waiting: int):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = None
+
+    @asynccontextmanager
+    async def slot(self):
+        # created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            raise LLMBusyError("Too many questions in progress, please try again shortly.")
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+
+llm_limiter = ConcurrencyLimiter(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE)
+
+
+def make_async_http_client() -> httpx.AsyncClient:
+    """
+    One pooled client per process, reused by every request so connections (and
+    their TLS sessions) are kept alive between questions.
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONCURRENCY,
+            max_keepalive_connections=LLM_MAX_CONCURRENCY,
+        ),
+    )
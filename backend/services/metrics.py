@@ -0,0 +1,174 @@
+# backend/services/metrics.py
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds in seconds, from sub-millisecond lookups to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Stage timings of the current request, set only when the client asked for a trace
+current_trace: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("current_trace", default=None)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: observe() is a bisect and an increment. Quantiles are
+    estimated from the buckets by linear interpolation, like histogram_quantile().
+    """
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None or not series[2]:
+                return None
+            counts, count = list(series[0]), series[2]
+        return self._quantile(counts, count, q)
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        rank = q * count
+        seen = 0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c:
+                if i == len(self.buckets):
+                    # +Inf bucket: the best we can say is "above the last bound"
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        quantile_lines = []
+        with self._lock:
+            snapshot = [(key, list(s[0]), s[1], s[2]) for key, s in sorted(self._series.items())]
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+            for q in QUANTILES:
+                labels = _format_labels(key, 'quantile="%s"' % q)
+                quantile_lines.append(f"{self.name}_quantile{labels} {self._quantile(counts, count, q)}")
+
+        if quantile_lines:
+            lines.append(f"# HELP {self.name}_quantile Estimated from {self.name} buckets")
+            lines.append(f"# TYPE {self.name}_quantile gauge")
+            lines.extend(quantile_lines)
+        return lines
+
+
+STAGE_SECONDS = Histogram("rag_stage_seconds", "Time spent in each RAG pipeline stage")
+CHUNKS = Counter("rag_chunks_total", "Chunks produced by /extract")
+LLM_TOKENS = Counter("rag_llm_tokens_total", "LLM tokens by kind (prompt or completion)")
+CACHE_LOOKUPS = Counter("rag_cache_lookups_total", "Cache lookups by cache and result")
+
+REGISTRY = [STAGE_SECONDS, CHUNKS, LLM_TOKENS, CACHE_LOOKUPS]
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+class Stopwatch:
+    """
+    Accumulates time over several separate intervals (e.g. the extraction steps of
+    a streaming pipeline) and records the total as one stage observation.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.total += time.perf_counter() - self._start
+
+    def record(self, stage: str) -> None:
+        record_stage(stage, self.total)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def format_server_timing(trace: List[Tuple[str, float]]) -> str:
+    """
+    Server-Timing header value, durations in milliseconds.
+    """
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in trace)
@@ -1,13 +1,107 @@
-from pypdf import PdfReader
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from typing import Iterator, List, Optional, Tuple
 
-def extract_text_from_pdf(pdf_bytes: bytes):
-    reader = PdfReader(BytesIO(pdf_bytes))
-    full_text = ""
+from pypdf import PdfReader
+
+from services.metrics import Stopwatch
+
+# Pages handed to a worker per task, and how many tasks may be in flight at once.
+# Together they bound how much extracted text is buffered for a single upload.
+PAGES_PER_TASK = 8
+MAX_PENDING_TASKS = 4
+# Smaller documents are extracted inline; a pool round trip costs more than it saves
+MIN_PAGES_FOR_POOL = 16
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # the server process is multi-threaded; forking it can deadlock the children
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 2,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
 
-    for page in reader.pages:
-        extracted = page.extract_text()
-        if extracted:
-            full_text += extracted + "\n"
 
-    return full_text
+def _extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    # reading from the open file, pypdf only loads the xref table and the objects
+    # of the pages asked for, and nothing outlives the task
+    with open(path, "rb") as f:
+        reader = PdfReader(f)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(pdf_bytes: bytes, parallel: bool = True) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) for each page with text, in page order, starting at 1.
+    Large documents are split into page ranges extracted in a process pool. The
+    workers read the PDF from a temporary file, so the upload bytes are not
+    pickled into every task nor held by the workers.
+    """
+    # time spent extracting, excluding whatever the consumer does between pages
+    stopwatch = Stopwatch()
+    with stopwatch:
+        reader = PdfReader(BytesIO(pdf_bytes))
+        n_pages = len(reader.pages)
+
+    if not parallel or n_pages < MIN_PAGES_FOR_POOL:
+        for i, page in enumerate(reader.pages):
+            with stopwatch:
+                extracted = page.extract_text()
+            if extracted:
+                yield i + 1, extracted
+        stopwatch.record("pdf_parse")
+        return
+
+    pool = _get_pool()
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(pdf_bytes)
+        path = f.name
+    ranges = deque((start, min(start + PAGES_PER_TASK, n_pages))
+                   for start in range(0, n_pages, PAGES_PER_TASK))
+    pending = deque()
+
+    try:
+        while ranges or pending:
+            while ranges and len(pending) < MAX_PENDING_TASKS:
+                start, stop = ranges.popleft()
+                pending.append((start, pool.submit(_extract_page_range, path, start, stop)))
+
+            start, future = pending.popleft()
+            with stopwatch:
+                texts = future.result()
+            for offset, extracted in enumerate(texts):
+                if extracted:
+                    yield start + offset + 1, extracted
+        stopwatch.record("pdf_parse")
+    finally:
+        for _, future in pending:
+            future.cancel()
+        # tasks still running have read the file already, or their results are dropped
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def extract_text_from_pdf(pdf_bytes: bytes):
+    return "".join(text + "\n" for _, text in iter_pdf_pages(pdf_bytes))
@@ -1,47 +1,100 @@
 import os
+import numpy as np
 from pinecone import Pinecone, ServerlessSpec
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
+# before the service imports: some of them read their settings at import time
 load_dotenv()
 
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+from services.embedding_cache import EmbeddingCache
+from services.metrics import timed
+from services.vector_index import VectorIndex, encode_texts
+from services.vector_sync import VectorManifest, sync_document
 
-index_name = os.getenv("PINECONE_INDEX_NAME")
-region = os.getenv("PINECONE_REGION")
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+ENCODE_BATCH_SIZE = 64
 
-if index_name not in pc.list_indexes().names():
-    pc.create_index(
-        name=index_name,
-        dimension=384,
-        metric="cosine",
-        spec=ServerlessSpec(
-            cloud="aws",
-            region=region
+# "pinecone" (default) or "local" for the in-process VectorIndex
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+# Optional path prefix for persisting the local index (<path>.npy / <path>.json)
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH")
+# Build an IVF partition for approximate search once the local index reaches this size
+LOCAL_IVF_THRESHOLD = int(os.getenv("LOCAL_IVF_THRESHOLD", "50000"))
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+if VECTOR_BACKEND == "local":
+    if LOCAL_INDEX_PATH:
+        local_index = VectorIndex.load(LOCAL_INDEX_PATH, EMBEDDING_DIM)
+        manifest = VectorManifest(LOCAL_INDEX_PATH + ".manifest.json")
+    else:
+        local_index = VectorIndex(EMBEDDING_DIM)
+        manifest = VectorManifest()
+    index = None
+else:
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+
+    index_name = os.getenv("PINECONE_INDEX_NAME")
+    region = os.getenv("PINECONE_REGION")
+
+    if index_name not in pc.list_indexes().names():
+        pc.create_index(
+            name=index_name,
+            dimension=EMBEDDING_DIM,
+            metric="cosine",
+            spec=ServerlessSpec(
+                cloud="aws",
+                region=region
+            )
         )
-    )
 
-index = pc.Index(index_name)
+    index = pc.Index(index_name)
+    local_index = None
+    os.makedirs(DATA_DIR, exist_ok=True)
+    manifest = VectorManifest(os.path.join(DATA_DIR, f"pinecone_manifest_{index_name}.json"))
+
+model = SentenceTransformer(EMBEDDING_MODEL)
+embedding_cache = EmbeddingCache(EMBEDDING_MODEL)
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+def encode_batched(texts, encoder=None, batch_size=ENCODE_BATCH_SIZE):
+    # encoder defaults to the SentenceTransformer model
+    return encode_texts(encoder or model, texts, batch_size)
 
-def store_chunks(chunks):
-    vectors = []
-    for i, chunk in enumerate(chunks):
-        emb = model.encode(chunk).tolist()
-        vectors.append({
-            "id": f"chunk_{i}",
-            "values": emb,
-            "metadata": {"text": chunk},
-        })
+def embed_chunks(chunks):
+    # only chunks not seen before (by this model) are sent to the encoder
+    with timed("embedding"):
+        return np.vstack(embedding_cache.embed(chunks, encode_batched))
 
-    index.upsert(vectors=vectors)
+def store_chunks(chunks, doc_id):
+    """
+    Sync a document's chunks into the vector index. Ids are content-derived and
+    scoped to doc_id, so re-storing a document only upserts new or changed chunks
+    and deletes the ones it no longer has; other documents are left alone.
+    """
+    target = local_index if local_index is not None else index
+    stats = sync_document(target, manifest, doc_id, chunks, embed_chunks)
+
+    if local_index is not None:
+        # rows added later are assigned to the existing lists, so partition once
+        if not local_index.has_ivf and len(local_index) >= LOCAL_IVF_THRESHOLD:
+            local_index.build_ivf()
+        if LOCAL_INDEX_PATH:
+            local_index.save(LOCAL_INDEX_PATH)
+    return stats
 
 def query_chunks(query):
-    emb = model.encode(query).tolist()
-    results = index.query(
-        vector=emb,
-        top_k=5,
-        include_metadata=True
-    )
-    return [match["metadata"]["text"] for match in results["matches"]]
+    with timed("query_embedding"):
+        emb = encode_batched([query])[0]
+
+    with timed("retrieval"):
+        if local_index is not None:
+            return [meta["text"] for _, _, meta in local_index.search(emb, top_k=5)]
+
+        results = index.query(
+            vector=emb.tolist(),
+            top_k=5,
+            include_metadata=True
+        )
+        return [match["metadata"]["text"] for match in results["matches"]]
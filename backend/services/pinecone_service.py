@@ -1,15 +1,25 @@
+import os
 from pinecone import Pinecone
 from utils.config import PINECONE_API_KEY, PINECONE_INDEX
 
+from services.vector_sync import VectorManifest, sync_document
+
 pc = Pinecone(api_key=PINECONE_API_KEY)
 index = pc.Index(PINECONE_INDEX)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+os.makedirs(DATA_DIR, exist_ok=True)
+manifest = VectorManifest(os.path.join(DATA_DIR, f"pinecone_manifest_{PINECONE_INDEX}.json"))
 
-def upsert_chunks(chunks, vectors):
-    records = []
-    for i, vector in enumerate(vectors):
-        records.append((str(i), vector, {"text": chunks[i]}))
-
-    index.upsert(records)
+def upsert_chunks(chunks, vectors, doc_id):
+    """
+    Sync a document's chunks and their precomputed vectors into the index.
+    Unchanged chunks are skipped and chunks the document no longer has are deleted.
+    """
+    vectors_by_chunk = dict(zip(chunks, vectors))
+    return sync_document(
+        index, manifest, doc_id, chunks,
+        lambda texts: [vectors_by_chunk[t] for t in texts],
+    )
 
 def query_pinecone(vector, top_k=5):
     return index.query(
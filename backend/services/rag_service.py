@@ -1,5 +1,8 @@
 from langchain_openai import ChatOpenAI
 
+from services.llm_client import llm_limiter
+from services.metrics import timed
+
 llm = ChatOpenAI(model="gpt-4o-mini")
 
 def build_prompt(context, question):
@@ -16,6 +19,28 @@ def build_prompt(context, question):
     """
 
 def generate_answer(context, question):
-    prompt = build_prompt(context, question)
-    response = llm.invoke(prompt)
+    with timed("prompt_build"):
+        prompt = build_prompt(context, question)
+    with timed("llm"):
+        response = llm.invoke(prompt)
+    return response.content
+
+async def agenerate_answer(context, question):
+    with timed("prompt_build"):
+        prompt = build_prompt(context, question)
+    async with llm_limiter.slot():
+        with timed("llm"):
+            response = await llm.ainvoke(prompt)
     return response.content
+
+async def astream_answer(context, question):
+    """
+    Yield the answer text piece by piece as the model produces it.
+    """
+    with timed("prompt_build"):
+        prompt = build_prompt(context, question)
+    async with llm_limiter.slot():
+        with timed("llm"):
+            async for chunk in llm.astream(prompt):
+                if chunk.content:
+                    yield chunk.content
@@ -0,0 +1,231 @@
+# backend/services/vector_index.py
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def encode_texts(encoder, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+    """
+    Encode texts in batches into a float32 matrix of shape (len(texts), dim). encoder
+    is a SentenceTransformer or anything with a compatible
+    encode(list, batch_size=..., convert_to_numpy=...), e.g. a stub in offline tests.
+    """
+    return np.asarray(
+        encoder.encode(list(texts), batch_size=batch_size, convert_to_numpy=True),
+        dtype=np.float32,
+    )
+
+
+class VectorIndex:
+    """
+    In-process cosine-similarity index over a contiguous float32 matrix.
+
+    Rows are L2-normalized on insert so a dot product is the cosine score. Search is
+    exact (one matrix-vector product + argpartition) unless an IVF partition has been
+    built with build_ivf(), in which case only the n_probe closest lists are scanned.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self._data = np.empty((0, dim), dtype=np.float32)
+        self._size = 0
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        # IVF state: centroids (n_lists, dim) and the row numbers assigned to each list
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def has_ivf(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._data[: self._size]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed <= self._data.shape[0] and self._data.flags.writeable:
+            return
+        # grow geometrically so repeated adds stay amortized O(n); this also turns a
+        # read-only memory-mapped matrix into a writable in-memory one
+        capacity = max(needed, 2 * self._data.shape[0], 1024)
+        data = np.empty((capacity, self.dim), dtype=np.float32)
+        data[: self._size] = self._data[: self._size]
+        self._data = data
+
+    def add(self, ids: Sequence[str], vectors, metadata: Optional[Sequence[Dict[str, Any]]] = None) -> None:
+        """
+        Insert rows, overwriting any row whose id already exists.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        if metadata is None:
+            metadata = [{} for _ in ids]
+        vectors = self._normalize(vectors)
+
+        with self._lock:
+            start = self._size
+            new_rows = sum(1 for i in set(ids) if i not in self._rows)
+            self._reserve(new_rows)
+            for id_, vector, meta in zip(ids, vectors, metadata):
+                row = self._rows.get(id_)
+                if row is None:
+                    row = self._size
+                    self._rows[id_] = row
+                    self._size += 1
+                    self.ids.append(id_)
+                    self.metadata.append(meta)
+                else:
+                    # overwritten rows keep their IVF list; ids are content-derived, so
+                    # an overwrite carries (nearly) the same vector
+                    self.metadata[row] = meta
+                self._data[row] = vector
+
+            if self._centroids is not None and self._size > start:
+                self._assign(np.arange(start, self._size))
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            rows = [self._rows[i] for i in ids if i in self._rows]
+            if not rows:
+                return
+            keep = np.ones(self._size, dtype=bool)
+            keep[rows] = False
+
+            self._data = np.ascontiguousarray(self.vectors[keep])
+            self.ids = [i for i, k in zip(self.ids, keep) if k]
+            self.metadata = [m for m, k in zip(self.metadata, keep) if k]
+            self._size = len(self.ids)
+            self._rows = {id_: row for row, id_ in enumerate(self.ids)}
+
+            if self._centroids is not None:
+                new_row = np.cumsum(keep) - 1
+                self._lists = [new_row[rows_[keep[rows_]]] for rows_ in self._lists]
+
+    # Pinecone-compatible entry points, so the local index can stand in for pc.Index
+
+    def upsert(self, vectors: Sequence[Dict[str, Any]]) -> None:
+        self.add(
+            [v["id"] for v in vectors],
+            [v["values"] for v in vectors],
+            [v.get("metadata", {}) for v in vectors],
+        )
+
+    # -- approximate search --
+
+    def build_ivf(self, n_lists: Optional[int] = None, n_iter: int = 10, seed: int = 0) -> None:
+        """
+        Partition rows with spherical k-means. Defaults to ~sqrt(n) lists.
+        """
+        with self._lock:
+            vectors = self.vectors
+            if not len(vectors):
+                return
+            n_lists = min(n_lists or max(1, int(np.sqrt(len(vectors)))), len(vectors))
+            rng = np.random.default_rng(seed)
+            centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+
+            for _ in range(n_iter):
+                assignment = np.argmax(vectors @ centroids.T, axis=1)
+                for c in range(n_lists):
+                    members = vectors[assignment == c]
+                    if len(members):
+                        centroids[c] = members.sum(axis=0)
+                centroids = self._normalize(centroids)
+
+            self._centroids = centroids
+            self._lists = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+            self._assign(np.arange(len(vectors)))
+
+    def _assign(self, rows: np.ndarray) -> None:
+        assignment = np.argmax(self._data[rows] @ self._centroids.T, axis=1)
+        for c in np.unique(assignment):
+            self._lists[c] = np.concatenate([self._lists[c], rows[assignment == c]])
+
+    def _candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        centroid_scores = self._centroids @ query
+        n_probe = min(n_probe, len(centroid_scores))
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        return np.concatenate([self._lists[c] for c in probe])
+
+    # -- search --
+
+    def search(self, query, top_k: int = 5, approximate: Optional[bool] = None,
+               n_probe: int = 8) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Return up to top_k (id, score, metadata) tuples, best first. approximate
+        defaults to True when an IVF partition exists.
+        """
+        query = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, self.dim))[0]
+        if approximate is None:
+            approximate = self.has_ivf
+
+        with self._lock:
+            if not self._size:
+                return []
+            if approximate and self.has_ivf:
+                rows = self._candidates(query, n_probe)
+                scores = self._data[rows] @ query
+            else:
+                rows = None
+                scores = self.vectors @ query
+
+            k = min(top_k, len(scores))
+            if not k:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            top_rows = rows[top] if rows is not None else top
+
+            return [(self.ids[r], float(s), self.metadata[r]) for r, s in zip(top_rows, scores[top])]
+
+    # -- persistence --
+
+    def save(self, path: str) -> None:
+        """
+        Write the matrix to <path>.npy and ids/metadata to <path>.json.
+        """
+        with self._lock:
+            with open(path + ".npy.tmp", "wb") as f:
+                np.save(f, self.vectors, allow_pickle=False)
+            os.replace(path + ".npy.tmp", path + ".npy")
+            with open(path + ".json.tmp", "w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim, "ids": self.ids, "metadata": self.metadata}, f)
+            os.replace(path + ".json.tmp", path + ".json")
+
+    @classmethod
+    def load(cls, path: str, dim: int, mmap: bool = True) -> "VectorIndex":
+        """
+        Load an index written by save(). With mmap the matrix stays on disk and is
+        paged in on demand; it is copied into memory on the first add().
+        """
+        index = cls(dim)
+        if not os.path.exists(path + ".npy"):
+            return index
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["dim"] != dim:
+            raise ValueError(f"index at {path} has dimension {meta['dim']}, expected {dim}")
+        index._data = np.load(path + ".npy", mmap_mode="r" if mmap else None)
+        index._size = len(index._data)
+        index.ids = meta["ids"]
+        index.metadata = meta["metadata"]
+        index._rows = {id_: row for row, id_ in enumerate(index.ids)}
+        return index
@@ -0,0 +1,140 @@
+# backend/services/vector_sync.py
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import xxhash
+
+from services.metrics import timed
+
+# Pinecone caps upserts at 1000 vectors / 2 MB per request; stay well under both
+UPSERT_BATCH_SIZE = 100
+UPSERT_BATCH_BYTES = 1_500_000
+DELETE_BATCH_SIZE = 1000
+UPSERT_WORKERS = 4
+
+
+def chunk_ids(doc_id: str, chunks: Sequence[str]) -> List[str]:
+    """
+    Stable, content-derived ids: "<doc_id>#<xxh3-64 of text>". A text repeated
+    within the document gets a ":<n>" suffix for its n-th repeat.
+    """
+    ids = []
+    seen: Dict[str, int] = {}
+    for chunk in chunks:
+        digest = xxhash.xxh3_64_hexdigest(chunk.encode("utf-8"))
+        n = seen.get(digest, 0)
+        seen[digest] = n + 1
+        ids.append(f"{doc_id}#{digest}" if n == 0 else f"{doc_id}#{digest}:{n}")
+    return ids
+
+
+class VectorManifest:
+    """
+    Which vector ids each document currently has in the index. Kept in a JSON file
+    (or only in memory when path is None) so a re-upload can be diffed without
+    listing the remote index.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._docs: Dict[str, List[str]] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._docs = json.load(f)
+
+    def get(self, doc_id: str) -> List[str]:
+        return self._docs.get(doc_id, [])
+
+    def set(self, doc_id: str, ids: List[str]) -> None:
+        with self._lock:
+            if ids:
+                self._docs[doc_id] = ids
+            else:
+                self._docs.pop(doc_id, None)
+            if self.path:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._docs, f)
+                os.replace(tmp_path, self.path)
+
+
+def _record_size(record: Dict[str, Any]) -> int:
+    # rough JSON payload size: ~10 bytes per float plus metadata text
+    text = record.get("metadata", {}).get("text", "")
+    return 10 * len(record["values"]) + len(text.encode("utf-8")) + len(record["id"]) + 64
+
+
+def _batches(records: Sequence[Dict[str, Any]], max_count: int, max_bytes: int):
+    batch, size = [], 0
+    for record in records:
+        record_size = _record_size(record)
+        if batch and (len(batch) >= max_count or size + record_size > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(record)
+        size += record_size
+    if batch:
+        yield batch
+
+
+def upsert_batched(index, records: Sequence[Dict[str, Any]], workers: int = UPSERT_WORKERS) -> None:
+    """
+    Send records to index.upsert in size-bounded batches, several in flight at once.
+    Raises the first batch error after all batches finish.
+    """
+    batches = list(_batches(records, UPSERT_BATCH_SIZE, UPSERT_BATCH_BYTES))
+    if len(batches) == 1:
+        index.upsert(vectors=batches[0])
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(index.upsert, vectors=batch) for batch in batches]
+    for future in futures:
+        future.result()
+
+
+def delete_batched(index, ids: Sequence[str]) -> None:
+    for start in range(0, len(ids), DELETE_BATCH_SIZE):
+        index.delete(ids=list(ids[start: start + DELETE_BATCH_SIZE]))
+
+
+def sync_document(index, manifest: VectorManifest, doc_id: str, chunks: Sequence[str],
+                  embed: Callable[[List[str]], Sequence]) -> Dict[str, int]:
+    """
+    Make the index hold exactly this document's current chunks.
+
+    Only chunks whose id is not already indexed are embedded and upserted; ids the
+    document no longer has are deleted. The manifest is updated last, so a failed
+    sync is simply redone on the next call. Works with a Pinecone index or anything
+    exposing the same upsert(vectors=...) / delete(ids=...) methods.
+    """
+    ids = chunk_ids(doc_id, chunks)
+    previous = set(manifest.get(doc_id))
+    current = set(ids)
+
+    new = [(chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if chunk_id not in previous]
+    stale = [chunk_id for chunk_id in manifest.get(doc_id) if chunk_id not in current]
+
+    if new:
+        vectors = embed([chunk for _, chunk in new])
+        records = [
+            {
+                "id": chunk_id,
+                "values": np.asarray(vector, dtype=np.float32).tolist(),
+                "metadata": {"text": chunk, "doc_id": doc_id},
+            }
+            for (chunk_id, chunk), vector in zip(new, vectors)
+        ]
+        with timed("upsert"):
+            upsert_batched(index, records)
+    if stale:
+        with timed("delete"):
+            delete_batched(index, stale)
+
+    manifest.set(doc_id, ids)
+    return {"upserted": len(new), "deleted": len(stale), "unchanged": len(ids) - len(new)}
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modules import each other as "services.x", relative to backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from services import answer_cache as answer_cache_module
+from services.answer_cache import AnswerCache, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _use_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(answer_cache_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_exact_hit_ignores_case_spacing_and_punctuation():
+    cache = AnswerCache()
+    cache.put("What is the revenue?", [1, 2, 3], "42")
+    assert normalize_query("  what IS the   revenue ") == "what is the revenue"
+    assert cache.get("what is  the REVENUE", [1, 2, 3]) == "42"
+    # same question over different context is a different entry
+    assert cache.get("what is the revenue", [1, 2, 4]) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_semantic_tier_requires_the_same_context():
+    cache = AnswerCache(semantic_threshold=0.9)
+    vector = np.ones(4)
+    cache.put("revenue of doc A", [1, 2, 3], "doc A answer", vector)
+
+    # a near-identical question about other chunks must not get doc A's answer
+    assert cache.get("revenue of doc B", [40, 41, 42]) is None
+    assert cache.get_similar(vector, [40, 41, 42]) is None
+
+    assert cache.get_similar(vector * 1.01, [3, 2, 1]) == "doc A answer"
+    assert cache.semantic_hits == 1
+
+
+def test_semantic_tier_threshold_and_overlap():
+    cache = AnswerCache(semantic_threshold=0.9)
+    cache.put("q", [1, 2, 3, 4, 5], "five", np.array([1.0, 0.0, 0.0, 0.0]))
+
+    # 4 of 5 ids shared is enough, 3 of 5 is not
+    assert cache.get_similar(np.array([1.0, 0.0, 0.0, 0.0]), [1, 2, 3, 4, 9]) == "five"
+    assert cache.get_similar(np.array([1.0, 0.0, 0.0, 0.0]), [1, 2, 3, 8, 9]) is None
+    # same context, dissimilar question
+    assert cache.get_similar(np.array([0.0, 1.0, 0.0, 0.0]), [1, 2, 3, 4, 5]) is None
+
+
+def test_semantic_tier_off_by_default():
+    cache = AnswerCache()
+    cache.put("q", [1], "answer", np.ones(4))
+    assert cache.get_similar(np.ones(4), [1]) is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = _use_clock(monkeypatch)
+    cache = AnswerCache(ttl_seconds=10, semantic_threshold=0.9)
+    cache.put("q", [1], "answer", np.ones(4))
+
+    clock.now += 9
+    assert cache.get("q", [1]) == "answer"
+    clock.now += 2
+    assert cache.get_similar(np.ones(4), [1]) is None
+    assert cache.get("q", [1]) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_items=2)
+    cache.put("a", [1], "A")
+    cache.put("b", [1], "B")
+    assert cache.get("a", [1]) == "A"  # "b" is now the least recently used
+    cache.put("c", [1], "C")
+
+    assert len(cache) == 2
+    assert cache.get("b", [1]) is None
+    assert cache.get("a", [1]) == "A"
+    assert cache.get("c", [1]) == "C"
+
+
+def test_answers_from_before_a_clear_are_not_stored():
+    cache = AnswerCache()
+    generation = cache.generation
+    cache.put("q", [1], "old")
+
+    # an upload lands while a slow answer is still being generated
+    cache.clear()
+    assert cache.get("q", [1]) is None
+    cache.put("q", [1], "stale", generation=generation)
+    assert cache.get("q", [1]) is None
+
+    cache.put("q", [1], "fresh", generation=cache.generation)
+    assert cache.get("q", [1]) == "fresh"
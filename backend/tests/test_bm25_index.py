@@ -0,0 +1,29 @@
+from services.bm25_index import BM25Index
+
+
+def test_search_ranks_matching_documents():
+    index = BM25Index()
+    index.add(["the cat sat on the mat", "dogs chase cats", "stock market revenue report"])
+    hits = index.search("revenue report", top_k=2)
+    assert [doc_id for doc_id, _ in hits] == [2]
+    assert index.search("unrelated words") == []
+
+
+def test_search_within_id_range():
+    index = BM25Index()
+    index.add(["revenue of doc A", "costs of doc A", "revenue of doc B", "costs of doc B"])
+    assert {doc_id for doc_id, _ in index.search("revenue")} == {0, 2}
+    assert [doc_id for doc_id, _ in index.search("revenue", id_range=(2, 4))] == [2]
+    assert index.search("revenue", id_range=(3, 4)) == []
+
+
+def test_flush_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "index.json")
+    index = BM25Index()
+    for batch in (["alpha beta"], ["beta gamma"], ["gamma delta"], ["delta alpha"]):
+        index.add(batch)
+        index.flush(path)
+        loaded = BM25Index.load(path)
+        assert loaded.doc_lens == index.doc_lens
+        assert loaded.postings == index.postings
+    assert BM25Index.load(path).search("alpha") == index.search("alpha")
@@ -0,0 +1,92 @@
+import pytest
+
+from services.chunk_store import ChunkStore
+
+
+def test_round_trip_across_documents(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    assert len(store) == 0
+
+    doc_a, ids_a = store.append("a.pdf", ["alpha", "beta"], [1, 2])
+    doc_b, ids_b = store.append("b.pdf", ["gamma", "δέλτα ünïcode"], [5, 7])
+
+    assert (doc_a, ids_a) == (0, [0, 1])
+    assert (doc_b, ids_b) == (1, [2, 3])
+    assert len(store) == 4
+    assert store.get_many(range(4)) == ["alpha", "beta", "gamma", "δέλτα ünïcode"]
+    assert bytes(store.get_bytes(3)) == "δέλτα ünïcode".encode("utf-8")
+    assert [store.doc_id(i) for i in range(4)] == [0, 0, 1, 1]
+    assert [store.page(i) for i in range(4)] == [1, 2, 5, 7]
+    assert list(store.iter_texts()) == ["alpha", "beta", "gamma", "δέλτα ünïcode"]
+    assert [(d["name"], d["start"], d["count"]) for d in store.documents()] == [
+        ("a.pdf", 0, 2), ("b.pdf", 2, 2),
+    ]
+
+
+def test_pages_default_to_zero(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    store.append("a.pdf", ["one", "two"])
+    assert [store.page(i) for i in range(2)] == [0, 0]
+
+
+def test_reopen_existing_store(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    store.append("a.pdf", ["one", "two"], [1, 1], content_hash="h-a")
+
+    reopened = ChunkStore(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.get_many([0, 1]) == ["one", "two"]
+    assert reopened.find("h-a")["name"] == "a.pdf"
+
+    # appends continue the global id sequence
+    assert reopened.append("b.pdf", ["three"]) == (1, [2])
+    assert ChunkStore(str(tmp_path)).get_many(range(3)) == ["one", "two", "three"]
+
+
+def test_torn_trailing_record_is_ignored(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    store.append("a.pdf", ["one", "two"])
+    # an append interrupted halfway through writing an index record
+    with open(store.index_path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    reopened = ChunkStore(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.get_many([0, 1]) == ["one", "two"]
+
+    # the next append overwrites the torn bytes instead of landing after them
+    reopened.append("b.pdf", ["three"], [4])
+    again = ChunkStore(str(tmp_path))
+    assert again.get_many(range(3)) == ["one", "two", "three"]
+    assert again.page(2) == 4
+
+
+def test_find_by_content_hash(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    store.append("a.pdf", ["one"], content_hash="h-a")
+    store.append("b.pdf", ["two"], content_hash="h-b")
+    store.append("legacy", ["three"])
+
+    assert store.find("h-b") == {"id": 1, "name": "b.pdf", "start": 1, "count": 1, "hash": "h-b"}
+    assert store.find("missing") is None
+    # documents() hands out a copy
+    store.documents().clear()
+    assert len(store.documents()) == 3
+
+
+def test_rejects_unknown_index_format(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    with open(store.index_path, "wb") as f:
+        f.write(b"\x00" * 32)
+    with pytest.raises(ValueError):
+        len(store)
+
+
+def test_torn_header_is_rewritten(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    # an interrupted first append that wrote only part of the header
+    with open(store.index_path, "wb") as f:
+        f.write(b"ND")
+    assert len(store) == 0
+    store.append("a.pdf", ["one"])
+    assert ChunkStore(str(tmp_path)).get_many([0]) == ["one"]
@@ -0,0 +1,117 @@
+import random
+
+import pytest
+
+from services import chunker
+from services.chunker import _chunk_tokens, _chunk_words, chunk_documents, chunk_pages
+
+
+def _text(n_words, seed=0):
+    # unique words of varied length, so each chunk can be mapped back to word positions
+    rng = random.Random(seed)
+    return " ".join(f"w{i}" + "x" * rng.randint(0, 12) for i in range(n_words))
+
+
+def _positions(chunk, index_of):
+    return [index_of[w] for w in chunk.split()]
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(50, 0), (80, 20), (120, 60), (30, 29)])
+def test_word_chunks_fit_keep_order_and_bound_overlap(chunk_size, chunk_overlap):
+    text = _text(400, seed=chunk_size)
+    words = text.split()
+    index_of = {w: i for i, w in enumerate(words)}
+    chunks = _chunk_words(text, chunk_size, chunk_overlap)
+
+    for chunk in chunks:
+        assert len(chunk) <= chunk_size or len(chunk.split()) == 1
+
+    covered = []
+    for previous, chunk in zip([None] + chunks, chunks):
+        positions = _positions(chunk, index_of)
+        assert positions == list(range(positions[0], positions[-1] + 1))
+        if previous is not None:
+            previous_positions = _positions(previous, index_of)
+            # the next chunk starts inside (or right after) the previous one and moves forward
+            assert previous_positions[0] < positions[0] <= previous_positions[-1] + 1
+            shared = words[positions[0]: previous_positions[-1] + 1]
+            assert len(" ".join(shared)) <= chunk_overlap
+        covered.extend(p for p in positions if not covered or p > covered[-1])
+
+    assert covered == list(range(len(words)))
+
+
+def test_word_chunks_keep_an_oversized_word_whole():
+    chunks = _chunk_words("tiny " + "y" * 30 + " end", chunk_size=10, chunk_overlap=3)
+    assert chunks == ["tiny", "y" * 30, "end"]
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        chunker.chunk_text("some text", chunk_size=10, chunk_overlap=10)
+
+
+class ByteEncoding:
+    """
+    Byte-level stand-in for a tiktoken encoding: one token per UTF-8 byte, so any
+    non-ASCII character spans several tokens.
+    """
+
+    def encode(self, text, disallowed_special=()):
+        return list(text.encode("utf-8"))
+
+    def decode(self, tokens):
+        return bytes(tokens).decode("utf-8", errors="replace")
+
+    def decode_single_token_bytes(self, token):
+        return bytes([token])
+
+
+@pytest.fixture
+def byte_encoding(monkeypatch):
+    monkeypatch.setattr(chunker, "_get_encoding", lambda name: ByteEncoding())
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(7, 0), (7, 2), (16, 5), (5, 4)])
+def test_token_windows_never_split_a_character(byte_encoding, chunk_size, chunk_overlap):
+    text = "héllo wörld 日本語のテキスト ünïcode ✓ " * 5
+    chunks = _chunk_tokens(text, chunk_size, chunk_overlap, "bytes")
+
+    for chunk in chunks:
+        assert "�" not in chunk
+        assert len(chunk.encode("utf-8")) <= chunk_size
+        assert chunk in text
+    assert text.startswith(chunks[0])
+    assert text.endswith(chunks[-1])
+    if chunk_overlap == 0:
+        assert "".join(chunks) == text
+
+
+def test_token_windows_overlap_by_at_most_chunk_overlap(byte_encoding):
+    text = "abcdefghijklmnopqrstuvwxyz"
+    assert _chunk_tokens(text, 10, 3, "bytes") == ["abcdefghij", "hijklmnopq", "opqrstuvwx", "vwxyz"]
+    assert _chunk_tokens("", 10, 3, "bytes") == []
+
+
+def test_token_windows_with_tiktoken():
+    try:
+        chunker._get_encoding("cl100k_base")
+    except Exception as e:
+        pytest.skip(f"cl100k_base encoding not available: {e}")
+    text = "Das Über-Ich 日本語のテキスト ünïcode ✓ " * 40
+    chunks = _chunk_tokens(text, 12, 4, "cl100k_base")
+    assert len(chunks) > 1
+    assert not any("�" in chunk for chunk in chunks)
+
+
+def test_chunk_documents_keeps_input_order():
+    texts = [_text(50, seed=i) for i in range(chunker.MIN_DOCS_FOR_POOL + 2)]
+    result = chunk_documents(texts, chunk_size=80, chunk_overlap=20, workers=2)
+    assert result == [chunker.chunk_text(t, 80, 20) for t in texts]
+
+
+def test_chunk_pages_keeps_page_numbers():
+    pages = [(1, "first page text"), (3, "third page")]
+    assert list(chunk_pages(pages, chunk_size=800, chunk_overlap=100)) == [
+        (1, "first page text"), (3, "third page"),
+    ]
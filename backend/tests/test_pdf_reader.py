@@ -0,0 +1,31 @@
+import os
+from io import BytesIO
+
+from pypdf import PdfReader, PdfWriter
+
+from services import pdf_reader
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "temp.pdf")
+
+
+def _sample_pdf(n_pages):
+    source = PdfReader(SAMPLE_PDF)
+    writer = PdfWriter()
+    for i in range(n_pages):
+        writer.add_page(source.pages[i % len(source.pages)])
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_parallel_extraction_matches_inline():
+    # enough pages for the pool, split into several tasks with a partial last one
+    pdf_bytes = _sample_pdf(pdf_reader.MIN_PAGES_FOR_POOL + pdf_reader.PAGES_PER_TASK + 1)
+    try:
+        parallel = list(pdf_reader.iter_pdf_pages(pdf_bytes))
+    finally:
+        pdf_reader.shutdown_pool()
+    inline = list(pdf_reader.iter_pdf_pages(pdf_bytes, parallel=False))
+
+    assert parallel == inline
+    assert [page for page, _ in parallel] == list(range(1, len(parallel) + 1))
@@ -0,0 +1,122 @@
+import numpy as np
+import xxhash
+
+from services.vector_index import VectorIndex, encode_texts
+
+DIM = 16
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def _brute_force(vectors, query, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = vectors @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+def _filled_index(n, seed=0):
+    vectors = _vectors(n, seed)
+    index = VectorIndex(DIM)
+    index.add([f"id{i}" for i in range(n)], vectors, [{"row": i} for i in range(n)])
+    return index, vectors
+
+
+class StubEncoder:
+    """
+    Stands in for SentenceTransformer: one fixed vector per text, batch sizes recorded.
+    """
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.batch_sizes.append(batch_size)
+        return np.stack([
+            np.random.default_rng(xxhash.xxh3_64_intdigest(t.encode("utf-8"))).standard_normal(DIM)
+            for t in texts
+        ])
+
+
+def test_exact_search_matches_brute_force():
+    index, vectors = _filled_index(500)
+    for query in _vectors(10, seed=1):
+        hits = index.search(query, top_k=7)
+        assert [meta["row"] for _, _, meta in hits] == _brute_force(vectors, query, 7)
+        scores = [score for _, score, _ in hits]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_add_overwrites_existing_ids():
+    index, vectors = _filled_index(10)
+    index.add(["id3"], vectors[:1], [{"row": 0}])
+    assert len(index) == 10
+    assert {id_ for id_, _, _ in index.search(vectors[0], top_k=2)} == {"id0", "id3"}
+
+
+def test_ivf_search_after_add():
+    index, vectors = _filled_index(400)
+    index.build_ivf(n_lists=8)
+    more = _vectors(100, seed=2)
+    index.add([f"id{i}" for i in range(400, 500)], more, [{"row": i} for i in range(400, 500)])
+    every = np.vstack([vectors, more])
+
+    # probing every list scans every row, so it must agree with exact search
+    for query in _vectors(5, seed=3):
+        approximate = index.search(query, top_k=5, approximate=True, n_probe=8)
+        assert [meta["row"] for _, _, meta in approximate] == _brute_force(every, query, 5)
+    assert sorted(np.concatenate(index._lists).tolist()) == list(range(500))
+
+
+def test_delete_remaps_ivf_lists():
+    index, vectors = _filled_index(300)
+    index.build_ivf(n_lists=6)
+    deleted = {f"id{i}" for i in range(0, 300, 3)}
+    index.delete(sorted(deleted))
+
+    assert len(index) == 200
+    assert not deleted & set(index.ids)
+    # every remaining row sits in exactly one list, under its new row number
+    assert sorted(np.concatenate(index._lists).tolist()) == list(range(200))
+    kept = [i for i in range(300) if f"id{i}" not in deleted]
+    for query in _vectors(5, seed=4):
+        hits = index.search(query, top_k=5, approximate=True, n_probe=6)
+        expected = [kept[r] for r in _brute_force(vectors[kept], query, 5)]
+        assert [meta["row"] for _, _, meta in hits] == expected
+
+
+def test_save_load_mmap_then_add(tmp_path):
+    path = str(tmp_path / "index")
+    index, vectors = _filled_index(50)
+    index.save(path)
+
+    loaded = VectorIndex.load(path, DIM, mmap=True)
+    assert isinstance(loaded._data, np.memmap)
+    assert not loaded._data.flags.writeable
+    assert loaded.search(vectors[7], top_k=1)[0][0] == "id7"
+
+    extra = _vectors(1, seed=5)
+    loaded.add(["new"], extra, [{"row": 50}])
+    assert loaded._data.flags.writeable
+    assert len(loaded) == 51
+    assert loaded.search(extra[0], top_k=1)[0][0] == "new"
+    assert loaded.search(vectors[7], top_k=1)[0][0] == "id7"
+    # the file on disk is untouched until the next save
+    assert len(VectorIndex.load(path, DIM)) == 50
+
+
+def test_encode_texts_with_stub_encoder():
+    encoder = StubEncoder()
+    texts = [f"chunk {i}" for i in range(5)]
+    matrix = encode_texts(encoder, texts, batch_size=2)
+
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (5, DIM)
+    assert encoder.batch_sizes == [2]
+    # stable per text, so results are reproducible across runs
+    assert np.array_equal(matrix[3], encode_texts(StubEncoder(), ["chunk 3"])[0])
+
+    index = VectorIndex(DIM)
+    index.add(texts, matrix)
+    assert index.search(encode_texts(encoder, ["chunk 4"])[0], top_k=1)[0][0] == "chunk 4"
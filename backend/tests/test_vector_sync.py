@@ -0,0 +1,88 @@
+import numpy as np
+import xxhash
+
+from services.vector_index import VectorIndex
+from services.vector_sync import VectorManifest, chunk_ids, sync_document
+
+DIM = 8
+
+
+class StubEncoder:
+    """
+    Deterministic stand-in for the embedding model that records what it was asked to embed.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [np.random.default_rng(xxhash.xxh3_64_intdigest(t.encode("utf-8"))).random(DIM, dtype=np.float32) for t in texts]
+
+
+class CountingIndex(VectorIndex):
+    def __init__(self, dim):
+        super().__init__(dim)
+        self.upserted = 0
+        self.deleted = 0
+
+    def upsert(self, vectors):
+        self.upserted += len(vectors)
+        super().upsert(vectors=vectors)
+
+    def delete(self, ids):
+        self.deleted += len(ids)
+        super().delete(ids)
+
+
+def test_sync_document_lifecycle():
+    index = CountingIndex(DIM)
+    manifest = VectorManifest()
+    embed = StubEncoder()
+
+    # new document: everything is embedded and upserted
+    stats = sync_document(index, manifest, "a.pdf", ["one", "two", "three"], embed)
+    assert stats == {"upserted": 3, "deleted": 0, "unchanged": 0}
+    assert (index.upserted, index.deleted) == (3, 0)
+    assert sorted(index.ids) == sorted(chunk_ids("a.pdf", ["one", "two", "three"]))
+
+    # unchanged: no embedding, no writes
+    stats = sync_document(index, manifest, "a.pdf", ["one", "two", "three"], embed)
+    assert stats == {"upserted": 0, "deleted": 0, "unchanged": 3}
+    assert (index.upserted, index.deleted) == (3, 0)
+    assert len(embed.calls) == 1
+
+    # edited: only the changed chunk is embedded, the old one is deleted
+    stats = sync_document(index, manifest, "a.pdf", ["one", "TWO", "three"], embed)
+    assert stats == {"upserted": 1, "deleted": 1, "unchanged": 2}
+    assert embed.calls[-1] == ["TWO"]
+    assert sorted(index.ids) == sorted(chunk_ids("a.pdf", ["one", "TWO", "three"]))
+
+    # a second document leaves the first alone, even with shared text
+    stats = sync_document(index, manifest, "b.pdf", ["one"], embed)
+    assert stats == {"upserted": 1, "deleted": 0, "unchanged": 0}
+    assert len(index) == 4
+
+    # emptied: all of the document's vectors go, and it leaves the manifest
+    stats = sync_document(index, manifest, "a.pdf", [], embed)
+    assert stats == {"upserted": 0, "deleted": 3, "unchanged": 0}
+    assert index.ids == chunk_ids("b.pdf", ["one"])
+    assert manifest.get("a.pdf") == []
+
+
+def test_synced_vectors_are_searchable():
+    index = VectorIndex(DIM)
+    embed = StubEncoder()
+    sync_document(index, VectorManifest(), "a.pdf", ["one", "two", "three"], embed)
+
+    query = embed(["two"])[0]
+    (best_id, score, meta), *_ = index.search(query, top_k=3)
+    assert best_id == chunk_ids("a.pdf", ["two"])[0]
+    assert meta == {"text": "two", "doc_id": "a.pdf"}
+    assert score > 0.999
+
+
+def test_repeated_chunks_get_distinct_ids():
+    ids = chunk_ids("a.pdf", ["same", "same", "other"])
+    assert len(set(ids)) == 3
+    assert ids[1] == ids[0] + ":1"
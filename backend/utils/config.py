@@ -4,5 +4,5 @@ from dotenv import load_dotenv
 load_dotenv()
 
 OPENAI_API_KEY=os.getenv("OPENAI_API_KEY")
-PINECIONE_API_KEY=os.getenv("PINECONE_API_KEY")
+PINECONE_API_KEY=os.getenv("PINECONE_API_KEY")
 PINECONE_INDEX=os.getenv("PINECONE_INDEX")
\ No newline at end of file
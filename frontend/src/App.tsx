@@ -3,6 +3,7 @@ import { useState } from "react";
 function App() {
   const [file, setFile] = useState<File | null>(null);
   const [chunks, setChunks] = useState<string[]>([]);
+  const [docId, setDocId] = useState<number | null>(null);
   const [loading, setLoading] = useState(false);
 
   const [question, setQuestion] = useState("");
@@ -32,6 +33,7 @@ function App() {
 
       const data = await res.json();
       setChunks(data.chunks || []);
+      setDocId(data.doc_id ?? null);
       if (data.message) console.log("Backend:", data.message);
     } catch (error) {
       console.error(error);
@@ -48,19 +50,45 @@ function App() {
     setAnswer("");
 
     try {
-      const res = await fetch("http://127.0.0.1:8000/ask", {
+      const res = await fetch("http://127.0.0.1:8000/ask/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ query: question }),
+        body: JSON.stringify(
+          docId === null ? { query: question } : { query: question, doc_id: docId }
+        ),
       });
 
-      if (!res.ok) {
+      if (!res.ok || !res.body) {
         const text = await res.text();
         throw new Error(`Server error: ${res.status} ${text}`);
       }
 
-      const data = await res.json();
-      setAnswer(data.answer || "No answer returned.");
+      // Server-sent events: one `data: {...}` line per token, blank line between events
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let received = "";
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop() || "";
+
+        for (const event of events) {
+          if (!event.startsWith("data: ")) continue;
+          const data = JSON.parse(event.slice(6));
+          if (data.error) throw new Error(data.error);
+          if (data.token) {
+            received += data.token;
+            setAnswer(received);
+          }
+        }
+      }
+
+      if (!received) setAnswer("No answer returned.");
     } catch (error) {
       console.error(error);
       setAnswer("Error contacting AI — check backend terminal.");